@@ -11,118 +11,448 @@ gh_autoupdater.py — GitHub 自动更新器（最新版）
       --interval 60
 """
 
-import argparse, os, sys, time, tempfile, json, hashlib
+import argparse, os, sys, re, errno, time, tempfile, json, hashlib, functools, threading, zipfile, shutil, signal, subprocess, shlex, mmap
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from typing import Optional, Tuple
 
+try:
+    import orjson as _json  # 可选：更快的 JSON 解析
+except ImportError:
+    import json as _json
+
+_stop = threading.Event()  # 置位后轮询立即退出
+_wake = threading.Event()  # 置位后立即进行一次检测（不必等满 interval）
+_POOLS = {}                # 代理地址（None 为直连）-> 复用的 urllib3 连接池，保持连接 keep-alive
+_last_etag = None          # 上次 latest.json 的 ETag / Last-Modified，用于条件请求
+_last_modified = None
+_last_fetch_ts = 0.0       # 上次实际请求 latest.json 的时间及其 Cache-Control max-age
+_max_age = 0
+# 跨进程保存上次检测结果，重启后首轮即可发条件请求
+_STATE_PATH = os.path.join(os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".config"),
+                           "gh_autoupdater", "state.json")
+_state = {}
+
 # =============== 工具函数 ===============
 
-def _need_requests() -> bool:
+def _need_urllib3() -> bool:
     try:
-        import requests  # noqa
+        import urllib3  # noqa
         return True
     except Exception:
-        print("[UPDATE] 缺少 requests，请先：pip install requests")
+        print("[UPDATE] 缺少 urllib3，请先：pip install urllib3")
         return False
 
-def _http_get(url: str, timeout: int = 10):
-    import requests
-    r = requests.get(url, timeout=timeout)
-    r.raise_for_status()
+def _get_pool(url: str):
+    """按 url 选择连接池：沿用环境变量 / Windows 系统代理设置（与 requests 行为一致）"""
+    from urllib.request import getproxies, proxy_bypass
+    parsed = urlparse(url)
+    proxy = getproxies().get(parsed.scheme)
+    if proxy and proxy_bypass(parsed.hostname or ""):
+        proxy = None
+    pool = _POOLS.get(proxy)
+    if pool is None:
+        import urllib3
+        from urllib3.util.retry import Retry
+        kw = dict(num_pools=2, maxsize=4,
+                  retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]))
+        if not proxy:
+            pool = urllib3.PoolManager(**kw)
+        elif proxy.lower().startswith("socks"):
+            from urllib3.contrib.socks import SOCKSProxyManager  # 需要 PySocks
+            pool = SOCKSProxyManager(proxy, **kw)
+        else:
+            pool = urllib3.ProxyManager(proxy, **kw)
+        _POOLS[proxy] = pool
+    return pool
+
+def _url_exists(url: str, timeout: int = 5) -> bool:
+    r = _get_pool(url).request("HEAD", url, timeout=timeout)
+    # 只有明确的 404/410 才算不存在；不支持 HEAD 的服务器（405/403 等）交给后续 GET 判断
+    return r.status not in (404, 410)
+
+def _check_status(r, url: str):
+    if r.status >= 400:
+        raise RuntimeError(f"HTTP {r.status}：{url}")
+
+def _http_get(url: str, timeout: int = 10, headers: Optional[dict] = None):
+    r = _get_pool(url).request("GET", url, timeout=timeout, headers=headers, preload_content=True)
+    _check_status(r, url)
     return r
 
-def _download_stream(url: str, dst_path: str, timeout: int = 30):
-    import requests
-    with requests.get(url, stream=True, timeout=timeout) as r:
-        r.raise_for_status()
-        with open(dst_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+def _preallocate(f, size: int):
+    """预先把文件扩展到最终大小，减少写入过程中的碎片和元数据更新"""
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(f.fileno(), 0, size)
+        else:
+            os.ftruncate(f.fileno(), size)  # Windows 上即 SetEndOfFile，失败时抛 OSError
+    except OSError:
+        f.seek(0)  # 预分配只是优化，失败时照常下载
+
+def _write_all(f, data: bytes) -> int:
+    """无缓冲 FileIO.write 可能只写入一部分，循环直到全部写完"""
+    view = memoryview(data)
+    while view:
+        view = view[f.write(view):]
+    return len(data)
 
-def _sha256_file(path: str) -> str:
+def _download_stream_hashed(url: str, dst_path: str, timeout: int = 30, size: Optional[int] = None) -> str:
+    """边下载边计算 SHA256，返回十六进制摘要（避免下载后再读一遍文件）"""
     h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
+    r = _get_pool(url).request("GET", url, timeout=timeout, preload_content=False)
+    try:
+        _check_status(r, url)
+        with open(dst_path, "wb", buffering=0) as f:
+            if size:
+                _preallocate(f, size)
+            written = 0
+            for chunk in r.stream(1024 * 1024, decode_content=True):
+                if _stop.is_set():
+                    raise RuntimeError("收到退出信号，下载已取消")
+                h.update(chunk)
+                written += _write_all(f, chunk)
+            if size and written != size:
+                f.truncate(written)  # 实际长度与 size 不符时去掉多余的预分配
+    finally:
+        r.release_conn()
     return h.hexdigest()
 
-def _parse_latest(body: str, content_type: str, latest_url: str) -> Tuple[str, Optional[str], Optional[str]]:
+class _MmapReader:
+    """mmap 上的只读文件对象，各自维护读位置，多个 ZipFile 可共享同一映射"""
+    def __init__(self, mm: mmap.mmap):
+        self._mm = mm
+        self._pos = 0
+
+    def read(self, n: int = -1) -> bytes:
+        end = len(self._mm) if n is None or n < 0 else min(self._pos + n, len(self._mm))
+        data = self._mm[self._pos:end]
+        self._pos = max(self._pos, end)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        base = (0, self._pos, len(self._mm))[whence]
+        self._pos = base + offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+def _extract_zip(zip_path: str, unpack_dir: str):
+    """整个 zip 只映射一次，所有解压线程共享这一份映射（失败时退回按路径打开）"""
+    with open(zip_path, "rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            mm = None
+        try:
+            if mm is None:
+                _extract_zip_from(lambda: zipfile.ZipFile(zip_path, "r"), unpack_dir)
+            else:
+                _extract_zip_from(lambda: zipfile.ZipFile(_MmapReader(mm), "r"), unpack_dir)
+        finally:
+            if mm is not None:
+                mm.close()
+
+def _extract_zip_from(open_zip, unpack_dir: str):
+    """多线程解压：每个工作线程各自打开 ZipFile（ZipFile 共享读位置，非线程安全）"""
+    with open_zip() as zf:
+        infos = zf.infolist()
+    root = os.path.abspath(unpack_dir)
+    jobs = []
+    for info in infos:
+        target = os.path.abspath(os.path.join(root, info.filename))
+        if target != root and not target.startswith(root + os.sep):
+            print(f"[UPDATE] 跳过非法路径：{info.filename}")
+            continue
+        # 先串行创建目录，避免多线程 makedirs 竞争
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            jobs.append((info, target))
+
+    local = threading.local()
+    opened = []
+    lock = threading.Lock()
+
+    def _extract_one(job):
+        info, target = job
+        zf = getattr(local, "zf", None)
+        if zf is None:
+            zf = local.zf = open_zip()
+            with lock:
+                opened.append(zf)
+        # 大缓冲区流式写出，大文件（exe、模型等）每字节开销更低
+        with zf.open(info) as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, length=1024 * 1024)
+
+    try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            list(ex.map(_extract_one, jobs))
+    finally:
+        for zf in opened:
+            zf.close()
+
+def _parse_latest(body: bytes, content_type: str, latest_url: str) -> Tuple[str, Optional[str], Optional[str], Optional[int]]:
     """
-    支持两种格式：
-      - JSON: {"version":"1.0.1","url":"https://...zip","sha256":"..."}
+    支持两种格式（body 为原始字节，不做编码探测）：
+      - JSON: {"version":"1.0.1","url":"https://...zip","sha256":"...","size":12345}（size 可选）
       - 文本: "1.0.1"
     """
+    if body.startswith(b"\xef\xbb\xbf"):  # 记事本保存的 UTF-8 BOM
+        body = body[3:]
     ct = (content_type or "").lower()
-    text = body.strip()
-    if "application/json" in ct or (text.startswith("{") and text.endswith("}")):
-        data = json.loads(text)
+    is_json = "json" in ct
+    if not is_json:
+        # 只找第一个非空白字符，避免对整个 body 做 strip 拷贝
+        for ch in body:
+            if ch not in b" \t\r\n":
+                is_json = ch == 0x7B  # "{"
+                break
+    if is_json:
+        data = _json.loads(body)  # 两种实现都容忍首尾空白
         ver = str(data.get("version", "")).strip()
         url = str(data.get("url", "")).strip() or None
         sha = str(data.get("sha256", "")).strip() or None
-        return ver, url, sha
-    return text, None, None
+        size = data.get("size")
+        if isinstance(size, str):
+            try:
+                size = int(size)
+            except ValueError:
+                size = None
+        if isinstance(size, bool) or not isinstance(size, int) or size <= 0:
+            size = None  # 只接受正整数
+        return ver, url, sha, size
+    return body.strip().decode("utf-8", "replace"), None, None, None
 
+def _parse_max_age(cache_control: str) -> int:
+    for part in (cache_control or "").split(","):
+        k, _, v = part.strip().partition("=")
+        if k.lower() == "max-age":
+            try:
+                return max(0, int(v.strip().strip('"')))
+            except ValueError:
+                return 0
+    return 0
+
+_POST_TAGS = {"post", "hotfix", "patch", "fix", "rev", "r"}
+
+@functools.lru_cache(maxsize=8)
+def _parse_ver(ver: str) -> Optional[tuple]:
+    """
+    解析版本号为可比较的元组，无法解析返回 None：
+      - "v1.0.10 "      -> ((1, 0, 10), 1)
+      - "1.0.1-rc.10"   -> ((1, 0, 1), 0, ...)，预发布版低于同号正式版
+      - "1.0.1-hotfix1" -> ((1, 0, 1), 2, ...)，post/hotfix/patch/fix/rev/r 或纯数字后缀高于正式版
+    其他后缀一律视为预发布。后缀按字母段、数字段拆开比较（rc10 > rc2）。
+    末尾的 0 去掉，使 1.0 与 1.0.0 相等；"+" 之后的构建信息忽略。
+    """
+    text = ver.strip().lstrip("vV").split("+", 1)[0]
+    m = re.match(r"\d+(?:\.\d+)*", text)
+    if not m:
+        return None
+    nums = [int(x) for x in m.group().split(".")]
+    while nums and nums[-1] == 0:
+        nums.pop()
+    tokens = re.findall(r"\d+|[a-z]+", text[m.end():].lower())
+    if not tokens:
+        return (tuple(nums), 1)
+    # 字母段与数字段分别带上类型标记，避免 int 与 str 直接比较
+    key = tuple((1, int(t), "") if t.isdigit() else (0, 0, t) for t in tokens)
+    is_post = tokens[0] in _POST_TAGS or tokens[0].isdigit()
+    return (tuple(nums), 2 if is_post else 0, key)
+
+def _is_newer(remote: str, current: str) -> bool:
+    r, c = _parse_ver(remote), _parse_ver(current)
+    if r is None or c is None:  # 无法解析为数字版本时退回字符串比较
+        return remote.strip() != current.strip()
+    return r > c
+
+@functools.lru_cache(maxsize=4)
 def _default_zip_url(latest_url: str, ver: str) -> str:
     parsed = urlparse(latest_url)
     base = "/".join(parsed.path.split("/")[:-1])
     return f"https://{parsed.netloc}{base}/releases/fisher_v{ver}.zip"
 
-def _make_update_bat(tmpdir: str, unpack_dir: str, target_dir: str, restart_cmd: Optional[str]) -> str:
-    bat = os.path.join(tmpdir, "update.bat")
-    restart_line = ""
+def _replace_or_copy(src: str, dst: str):
+    try:
+        os.replace(src, dst)  # 同分区时只是改名
+    except OSError as e:
+        # 只有跨分区（EXDEV / ERROR_NOT_SAME_DEVICE）才退回复制，其他错误照常抛出
+        if e.errno != errno.EXDEV and getattr(e, "winerror", None) != 17:
+            raise
+        shutil.copy2(src, dst)
+        os.remove(src)
+
+def _move_file(src: str, dst: str, retries: int = 5):
+    for i in range(retries):
+        try:
+            _replace_or_copy(src, dst)
+            return
+        except PermissionError:
+            if i < retries - 1:
+                time.sleep(0.5)  # 目标文件可能仍被占用，稍后重试
+                continue
+            # 仍被占用（例如正在运行的本程序）：Windows 允许改名运行中的 exe
+            old = dst + ".old"
+            if os.path.exists(old):
+                os.remove(old)
+            os.replace(dst, old)
+            _replace_or_copy(src, dst)
+            return
+
+def _overlay_dir(staging: str, target_dir: str):
+    """把 staging 中的文件逐个移动到 target_dir，保留目标目录中其他文件"""
+    for root, dirs, files in os.walk(staging):
+        dst_root = os.path.normpath(os.path.join(target_dir, os.path.relpath(root, staging)))
+        os.makedirs(dst_root, exist_ok=True)
+        for name in files:
+            _move_file(os.path.join(root, name), os.path.join(dst_root, name))
+
+def _apply_staged(staging: str, target_dir: str, restart_cmd: Optional[str] = None):
+    """--apply 模式：由 _apply_update 启动的独立进程执行，主进程已退出"""
+    print("[UPDATE] 等待主进程退出...")
+    time.sleep(1)
+    print(f"[UPDATE] 覆盖新文件到：{target_dir}")
+    try:
+        _overlay_dir(staging, target_dir)
+        applied = True
+    except OSError as e:
+        applied = False
+        print("[UPDATE] 覆盖时出错，请检查权限：", e)
     if restart_cmd:
-        restart_line = f"start \"\" {restart_cmd}\n"
-    with open(bat, "w", encoding="utf-8") as f:
-        f.write(f"""@echo off
-echo [UPDATE] 等待主进程退出...
-timeout /t 2 /nobreak >nul
-echo [UPDATE] 覆盖新文件到：{target_dir}
-xcopy /E /Y "{unpack_dir}\\*" "{target_dir}" >nul
-if %errorlevel% neq 0 echo [UPDATE] 复制时出错，请检查权限。
-echo [UPDATE] 启动程序...
-{restart_line}echo [UPDATE] 清理临时目录...
-rd /s /q "{tmpdir}" 2>nul
-exit
-""")
-    return bat
-
-def _apply_update(zip_url: str, target_dir: str, sha256_expect: Optional[str], restart_cmd: Optional[str]):
+        print("[UPDATE] 启动程序...")
+        # 不经过 shell：Windows 直接交给 CreateProcess 解析命令行，其他平台按 shlex 拆分
+        try:
+            if os.name == "nt":
+                subprocess.Popen(restart_cmd, creationflags=subprocess.CREATE_NEW_CONSOLE, close_fds=True)
+            else:
+                subprocess.Popen(shlex.split(restart_cmd), start_new_session=True, close_fds=True)
+        except OSError as e:
+            print("[UPDATE] 启动程序失败：", e)
+    if not applied:
+        # 保留尚未移动的新文件，便于手动补齐
+        print(f"[UPDATE] 更新未完成，新文件保留在：{staging}")
+        return
+    print("[UPDATE] 清理临时目录...")
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        os.rmdir(os.path.dirname(staging))
+    except OSError:
+        pass
+
+def _apply_update(zip_url: str, target_dir: str, sha256_expect: Optional[str], restart_cmd: Optional[str],
+                  size: Optional[int] = None):
     print(f"[UPDATE] 下载更新包：{zip_url}")
-    tmpdir = tempfile.mkdtemp(prefix="ghupd_")
+    try:
+        # 暂存目录放在目标目录旁（同一分区），覆盖时直接改名而不是复制
+        tmpdir = tempfile.mkdtemp(prefix="ghupd_", dir=os.path.dirname(target_dir))
+    except OSError:
+        # 上级目录不可写：退回系统临时目录，覆盖时由 _move_file 跨分区复制
+        tmpdir = tempfile.mkdtemp(prefix="ghupd_", dir=tempfile.gettempdir())
     zip_path = os.path.join(tmpdir, "update.zip")
-    _download_stream(zip_url, zip_path)
+    try:
+        got = _download_stream_hashed(zip_url, zip_path, size=size)
 
-    if sha256_expect:
-        got = _sha256_file(zip_path)
-        if got.lower() != sha256_expect.lower():
-            print(f"[UPDATE] 校验失败：期望 {sha256_expect}，实际 {got}")
-            print("[UPDATE] 取消更新。")
-            return
+        if sha256_expect:
+            if got.lower() != sha256_expect.lower():
+                print(f"[UPDATE] 校验失败：期望 {sha256_expect}，实际 {got}")
+                print("[UPDATE] 取消更新。")
+                shutil.rmtree(tmpdir, ignore_errors=True)
+                return
 
-    import zipfile
-    unpack = os.path.join(tmpdir, "extracted")
-    os.makedirs(unpack, exist_ok=True)
-    with zipfile.ZipFile(zip_path, "r") as zf:
-        zf.extractall(unpack)
+        unpack = os.path.join(tmpdir, "new")
+        os.makedirs(unpack, exist_ok=True)
+        _extract_zip(zip_path, unpack)
+        os.remove(zip_path)
+    except BaseException:
+        shutil.rmtree(tmpdir, ignore_errors=True)  # 下载或解压失败，不留下残缺的暂存目录
+        raise
 
-    print("[UPDATE] 生成更新脚本并执行...")
-    bat = _make_update_bat(tmpdir, unpack, target_dir, restart_cmd)
-    os.startfile(bat)  # 启动更新脚本
-    os._exit(0)        # 当前进程退出以释放文件锁
+    if _stop.is_set():
+        print("[UPDATE] 收到退出信号，取消更新。")
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        return
+
+    print("[UPDATE] 启动更新进程...")
+    if getattr(sys, "frozen", False):  # PyInstaller 打包后 sys.executable 即本程序
+        argv = [sys.executable]
+    else:
+        argv = [sys.executable, os.path.abspath(__file__)]
+    argv += ["--apply", unpack, target_dir]
+    if restart_cmd:
+        argv.append(restart_cmd)
+    # 让 onefile 子进程自行解包运行时，而不是复用本进程退出后即被删除的 _MEI 目录
+    env = dict(os.environ, PYINSTALLER_RESET_ENVIRONMENT="1")
+    if os.name == "nt":
+        subprocess.Popen(argv, close_fds=True, env=env,
+                         creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP)
+    else:
+        subprocess.Popen(argv, close_fds=True, start_new_session=True, env=env)
+    os._exit(0)  # 当前进程退出以释放文件锁
+
+def _load_state() -> dict:
+    try:
+        with open(_STATE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(state: dict):
+    try:
+        os.makedirs(os.path.dirname(_STATE_PATH), exist_ok=True)
+        tmp = _STATE_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, _STATE_PATH)
+    except OSError as e:
+        print("[UPDATE] 保存状态失败：", e)
 
 # =============== 核心逻辑 ===============
 
-def check_once(current: str, latest_url: str, target_dir: str, restart_cmd: Optional[str], insecure: bool):
-    if not _need_requests():
+def _restore_state(current: str, latest_url: str):
+    """上次看到的版本不比当前新时沿用其 ETag，重启后首轮检测即可得到 304"""
+    global _state, _last_etag, _last_modified
+    _state = _load_state()
+    seen = _state.get("last_seen")
+    if _state.get("url") == latest_url and seen and not _is_newer(seen, current):
+        _last_etag = _state.get("etag")
+        _last_modified = _state.get("modified")
+
+def check_once(current: str, latest_url: str, target_dir: str, restart_cmd: Optional[str], insecure: bool,
+               force: bool = False):
+    global _last_etag, _last_modified, _last_fetch_ts, _max_age, _state
+    if not _need_urllib3():
         return
+    if not force and _max_age and time.time() - _last_fetch_ts < _max_age:
+        return  # 服务端缓存未过期，内容不会变化（_wake 触发的立即检测不受此限）
     try:
-        r = _http_get(latest_url, timeout=8)
-        version, dl_url, sha256v = _parse_latest(r.text, r.headers.get("content-type", ""), latest_url)
+        hdrs = {"If-None-Match": _last_etag, "If-Modified-Since": _last_modified}
+        r = _http_get(latest_url, timeout=8, headers={k: v for k, v in hdrs.items() if v})
+        _last_fetch_ts = time.time()
+        _max_age = _parse_max_age(r.headers.get("Cache-Control", ""))
+        if r.status == 304:
+            print("[UPDATE] latest.json 未变化（304）")
+            return
+        _last_etag = r.headers.get("ETag")
+        _last_modified = r.headers.get("Last-Modified")
+        version, dl_url, sha256v, size = _parse_latest(r.data, r.headers.get("content-type", ""), latest_url)
         if not version:
             print("[UPDATE] latest.json 无版本号，跳过。")
             return
-        if version == current:
+        state = {"url": latest_url, "last_seen": version, "etag": _last_etag, "modified": _last_modified}
+        if state != _state:
+            _state = state
+            _save_state(state)
+        if not _is_newer(version, current):
             print(f"[UPDATE] 已是最新版本：{current}")
             return
 
@@ -132,17 +462,43 @@ def check_once(current: str, latest_url: str, target_dir: str, restart_cmd: Opti
             sha256v = None
 
         print(f"[UPDATE] 发现新版本 {version}（当前 {current}）")
-        _apply_update(dl_url, target_dir, sha256v, restart_cmd)
+        if _url_exists(dl_url):
+            _apply_update(dl_url, target_dir, sha256v, restart_cmd, size)
+        else:
+            print(f"[UPDATE] 更新包尚未上传：{dl_url}")
+        _last_etag = _last_modified = None  # 更新未完成，下次重新完整拉取
+        _max_age = 0
     except Exception as e:
+        _last_etag = _last_modified = None
+        _max_age = 0
         print("[UPDATE] 检测失败：", e)
 
 def loop(current: str, latest_url: str, target_dir: str, restart_cmd: Optional[str], interval: int, insecure: bool):
     interval = max(5, int(interval))
-    while True:
-        check_once(current, latest_url, target_dir, restart_cmd, insecure)
-        time.sleep(interval)
+    woke = False
+    while not _stop.is_set():
+        check_once(current, latest_url, target_dir, restart_cmd, insecure, force=woke)
+        # 分段等待：Windows 上 Event.wait(timeout) 不会被 Ctrl+C 打断，信号处理要等到超时才执行
+        deadline = time.monotonic() + interval
+        while not _stop.is_set() and not _wake.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _wake.wait(min(remaining, 0.5))
+        woke = _wake.is_set()
+        _wake.clear()
+
+def _on_signal(signum, frame):
+    print("[UPDATE] 收到退出信号，停止检测。")
+    _stop.set()
+    _wake.set()
 
 def main():
+    # 内部模式：gh_autoupdater --apply <staging> <target_dir> [restart_cmd]
+    if len(sys.argv) >= 4 and sys.argv[1] == "--apply":
+        _apply_staged(*sys.argv[2:5])
+        return
+
     ap = argparse.ArgumentParser(description="GitHub 自动更新器（独立版）")
     ap.add_argument("--current", required=True, help="当前版本号，如 1.0.0")
     ap.add_argument("--latest-url", required=True, help="latest.json 的 raw 直链")
@@ -158,6 +514,10 @@ def main():
         print(f"[UPDATE] 目标目录不存在：{args.target_dir}")
         sys.exit(1)
 
+    signal.signal(signal.SIGINT, _on_signal)
+    signal.signal(signal.SIGTERM, _on_signal)
+    _restore_state(args.current, args.latest_url)
+
     if args.once:
         check_once(args.current, args.latest_url, args.target_dir, args.restart, args.insecure)
     else: